@@ -1,10 +1,9 @@
 import os
-import json
 import streamlit as st
 import google.generativeai as genai
 from dotenv import load_dotenv
-import re
 from retry import retry
+from log_prompt import extract_info_from_logs, format_logs, generate_prompt
 
 # Load environment variables
 load_dotenv()
@@ -88,129 +87,6 @@ st.session_state.additional_instructions = st.text_area(
     help="Include details about your project (e.g., Next.js, React, Upstash) or specific fix instructions."
 )
 
-# Parse logs
-def format_logs(raw_input):
-    if not raw_input.strip():
-        return "", []
-    
-    extracted_logs = []
-    log_blocks = re.split(r'\n\s*\n', raw_input.strip())
-    for block in log_blocks:
-        block = block.strip()
-        if not block:
-            continue
-        try:
-            # Parse JSON logs (TypeScript/Next.js)
-            parsed = json.loads(block)
-            if isinstance(parsed, list):
-                extracted_logs.extend([log for log in parsed if isinstance(log, dict) and all(k in log for k in ['code', 'message', 'resource'])])
-            elif isinstance(parsed, dict) and all(k in parsed for k in ['code', 'message', 'resource']):
-                extracted_logs.append(parsed)
-        except json.JSONDecodeError:
-            # Parse console logs (Streamlit/Python)
-            lines = block.splitlines()
-            error_info = {}
-            for line in lines:
-                line = line.strip()
-                if not line:
-                    continue
-                file_match = re.search(r'File "([^"]+)", line (\d+)', line)
-                if file_match:
-                    error_info['file'] = file_match.group(1).split('/')[-1]
-                    error_info['line'] = file_match.group(2)
-                error_match = re.search(r'(\w+Error): (.+)', line)
-                if error_match:
-                    error_info['code'] = error_match.group(1)
-                    error_info['message'] = error_match.group(2)
-                code_match = re.search(r'^\s*(.+)$', line)
-                if code_match and 'code' in error_info and line not in lines[:lines.index(line)]:
-                    error_info['snippet'] = code_match.group(1)
-            if error_info.get('file') and error_info.get('code'):
-                extracted_logs.append(error_info)
-    
-    if not extracted_logs and raw_input.strip():
-        st.info("ℹ️ No valid error logs found. Ensure logs include file, error type, and message.")
-        return "", []
-    
-    formatted_json = json.dumps(extracted_logs, indent=2)
-    formatted_logs_md = f"""```json\n{formatted_json}\n```"""
-    return formatted_logs_md, extracted_logs
-
-# Extract files and error details
-def extract_info_from_logs(logs):
-    files = set()
-    errors = []
-    module_pattern = re.compile(r"Cannot find module '([^']+)'")
-    identifier_pattern = re.compile(r"Cannot find name '([^']+)'|`([^`]+)`")
-    async_pattern = re.compile(r"'await' expressions are only allowed")
-
-    for log in logs:
-        file_name = log.get('file') or log.get('resource', '').split('/')[-1]
-        if file_name:
-            files.add(file_name)
-        
-        error_info = {
-            'file': file_name,
-            'code': log.get('code', ''),
-            'message': log.get('message', ''),
-            'line': log.get('startLineNumber') or log.get('line', ''),
-            'snippet': log.get('snippet', ''),
-            'related': log.get('relatedInformation', []),
-            'module_path': None,
-            'identifier': None,
-            'async_issue': False
-        }
-        
-        # Extract module paths
-        module_match = module_pattern.search(log.get('message', ''))
-        if module_match:
-            error_info['module_path'] = module_match.group(1)
-        
-        # Extract identifiers
-        identifier_match = identifier_pattern.search(log.get('message', ''))
-        if identifier_match:
-            error_info['identifier'] = identifier_match.group(1) or identifier_match.group(2)
-        
-        # Detect async issues
-        if async_pattern.search(log.get('message', '')):
-            error_info['async_issue'] = True
-        
-        errors.append(error_info)
-    
-    return sorted(list(files)), errors
-
-# Generate AI prompt
-def generate_prompt(formatted_logs_md, files, errors, additional_instructions):
-    files_str = ", ".join(files) if files else "the provided files"
-    
-    prompt_parts = [
-        f"You are an expert developer for Next.js, React, and TypeScript. Analyze the provided error logs and instructions to identify and fix issues in {files_str}, a Next.js project potentially using Upstash Redis/Vector with .env configuration.",
-        "For each error, follow these steps:\n",
-        f"1. **Analyze Error**: Determine the root cause based on the error code, message, line number, and snippet (if available) in {files_str}. Consider Next.js-specific issues (e.g., module imports, path aliases, API routes, TypeScript configuration).",
-        "2. **Plan Fix**: Outline a solution compatible with Next.js and TypeScript. Check for:\n"
-        "- Missing files or incorrect import paths.\n"
-        "- `tsconfig.json` misconfigurations (e.g., `baseUrl`, `paths`).\n"
-        "- Missing dependencies or exports.\n"
-        "- Avoid hardcoding specific implementations; propose flexible solutions.",
-        "3. **Code Changes**: Provide TypeScript code snippets (```typescript) to fix the error. Include:\n"
-        "- File creation with minimal, context-appropriate code.\n"
-        "- Correct import statements or path adjustments.\n"
-        "- Dependency installations if applicable.\n"
-        "- Suggestions for `tsconfig.json` updates if relevant.",
-        f"4. **Verify Changes**: Explain how the fix resolves the error and ensures compatibility with {files_str}. Address impacts on Next.js API routes, React components, or Upstash integration. State assumptions if context is missing.",
-        f"5. **Placement**: Specify where to apply changes in {files_str}, new files, or `tsconfig.json`. Provide commands to verify fixes (e.g., `tsc`, `next build`)."
-    ]
-    
-    if formatted_logs_md:
-        prompt_parts.append("\n### Error Logs\n")
-        prompt_parts.append(formatted_logs_md)
-    
-    if additional_instructions:
-        prompt_parts.append("\n### Instructions\n")
-        prompt_parts.append(f"```\n{additional_instructions.strip()}\n```\n")
-    
-    return "".join(prompt_parts)
-
 # Retry-enabled Gemini API call
 @retry(tries=3, delay=2, backoff=2)
 def call_gemini(model, prompt):
@@ -226,6 +102,8 @@ if st.button("Generate AI Prompt"):
     else:
         try:
             formatted_logs_md, parsed_logs = format_logs(st.session_state.raw_input)
+            if not parsed_logs and st.session_state.raw_input.strip():
+                st.info("ℹ️ No valid error logs found. Ensure logs include file, error type, and message.")
             st.session_state.extracted_logs_count = len(parsed_logs)
             files, errors = extract_info_from_logs(parsed_logs)
             st.session_state.extracted_files = files
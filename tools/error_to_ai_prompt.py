@@ -1,45 +1,69 @@
 import streamlit as st
+import io
 import json
+from log_prompt import DEFAULT_PROMPT_LIMIT, build_prompts, file_label, iter_json_array
+
+# Separates prompts in the "Download all prompts" file
+PROMPT_SEPARATOR = "\n\n---\n\n"
 
 st.set_page_config(page_title="TS Error → AI Prompt Generator", layout="wide")
 
 st.title("🔧 TypeScript Error Logs → AI Prompt Generator")
 
-st.markdown("Paste your TypeScript error logs below:")
+st.markdown("Paste your TypeScript error logs below, or upload a large diagnostics export:")
 
 # Input: Raw error log
 raw_input = st.text_area("Paste raw error logs (JSON format):", height=300)
+uploaded_file = st.file_uploader("Or upload error logs (JSON file):", type=["json", "txt"])
+
+max_chars = st.number_input(
+    "Maximum characters per prompt:",
+    min_value=4000,
+    value=DEFAULT_PROMPT_LIMIT,
+    step=1000,
+    help="Diagnostics are grouped by file and split into several prompts below this size."
+)
+
+# Initialize session state
+if 'prompts' not in st.session_state:
+    st.session_state.prompts = []
 
 # Button to generate prompt
 if st.button("Generate AI Prompt"):
+    stream = uploaded_file if uploaded_file is not None else io.StringIO(raw_input)
+    st.session_state.prompts = []
     try:
-        # Parse error logs
-        logs = json.loads(raw_input)
-
-        # Render formatted logs
-        st.subheader("📄 Formatted Logs (Collapsible Markdown)")
-        formatted_logs = f"""<details>\n<summary>Click to expand logs</summary>\n\n```json\n{json.dumps(logs, indent=2)}\n```\n\n</details>"""
-        st.code(formatted_logs, language="markdown")
-
-        # Generate prompt
-        st.subheader("🤖 Copy-Ready AI Prompt")
-
-        prompt_template = """
-### Code Error Logs
-{formatted_logs}
-
-### AI Instruction / Prompt
-Please analyze and fix these TypeScript errors from `llm.ts`. Ensure:
-- No duplicate imports (e.g., 'pino').
-- All missing types or values are properly imported or defined (e.g., `QueryMetadata`, `VectorResult`, `UpstashError`, `LLMStructuredResponse`).
-- Any broken or missing dependencies are implemented, stubbed, or safely removed.
-- All functions continue to work and nothing breaks.
+        st.session_state.prompts = list(build_prompts(iter_json_array(stream), int(max_chars)))
+        if not st.session_state.prompts:
+            st.info("ℹ️ No error logs found in the input.")
+    except json.JSONDecodeError:
+        st.error("❌ Invalid JSON format. Please check your error logs.")
+    except ValueError as e:
+        st.error(f"❌ {e}")
 
-If needed, suggest fixes or rewrites for unclear sections. Include updated import statements or type/interface definitions if missing.
-""".strip()
+# Display prompts one at a time; the full set is offered as a download
+prompts = st.session_state.prompts
+if prompts:
+    total = sum(p["count"] for p in prompts)
+    truncated = sum(p["truncated"] for p in prompts)
+    files = {name for p in prompts for name in p["files"]}
+    st.subheader("🤖 Copy-Ready AI Prompts")
+    st.write(f"**{total} diagnostic(s) across {len(files)} file(s), split into {len(prompts)} prompt(s).**")
+    if truncated:
+        st.warning(f"⚠️ {truncated} oversized diagnostic(s) were reduced to previews.")
 
-        final_prompt = prompt_template.replace("{formatted_logs}", formatted_logs)
-        st.text_area("AI Prompt (Ready to Copy)", value=final_prompt, height=500)
+    st.download_button(
+        "Download all prompts",
+        data=PROMPT_SEPARATOR.join(p["text"] for p in prompts),
+        file_name="ai_prompts.md",
+        mime="text/markdown"
+    )
 
-    except json.JSONDecodeError:
-        st.error("❌ Invalid JSON format. Please check your error logs.")
+    number = st.number_input("Prompt to show:", min_value=1, max_value=len(prompts), value=1, step=1)
+    prompt = prompts[int(number) - 1]
+    label = ", ".join(file_label(name) for name in prompt["files"])
+    st.text_area(
+        f"Prompt {int(number)}/{len(prompts)} — {prompt['count']} diagnostic(s) in {label}",
+        value=prompt["text"],
+        height=300
+    )
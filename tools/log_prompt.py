@@ -0,0 +1,361 @@
+"""Log parsing and prompt building shared by the Streamlit tools and log_prompt_server.py."""
+import codecs
+import json
+import re
+from collections import OrderedDict
+
+# Input is read and parsed in chunks of this many characters/bytes
+CHUNK_SIZE = 64 * 1024
+# Default upper bound (in characters) for a single copy-ready prompt
+DEFAULT_PROMPT_LIMIT = 12000
+# Diagnostics that don't fit in a prompt are replaced by a preview with strings at most this long
+PREVIEW_CHARS = 500
+# Open per-file groups are packed into prompts once they hold this many prompts' worth of text
+PENDING_PROMPTS = 4
+# Characters that can continue a JSON number
+NUMBER_CHARS = "0123456789+-.eE"
+# Fields kept when an oversized diagnostic is reduced to a preview
+PREVIEW_FIELDS = ["resource", "file", "code", "severity", "startLineNumber", "line"]
+# File names in the instruction line are cut to this many characters
+MAX_FILE_LABEL = 80
+
+PROMPT_TEMPLATE = """
+### Code Error Logs
+{formatted_logs}
+
+### AI Instruction / Prompt
+Please analyze and fix these TypeScript errors from {files}. Ensure:
+- No duplicate imports (e.g., 'pino').
+- All missing types or values are properly imported or defined (e.g., `QueryMetadata`, `VectorResult`, `UpstashError`, `LLMStructuredResponse`).
+- Any broken or missing dependencies are implemented, stubbed, or safely removed.
+- All functions continue to work and nothing breaks.
+
+If needed, suggest fixes or rewrites for unclear sections. Include updated import statements or type/interface definitions if missing.
+""".strip()
+
+LOGS_TEMPLATE = "<details>\n<summary>Click to expand logs</summary>\n\n```json\n[\n{entries}\n]\n```\n\n</details>"
+
+
+# Incrementally parse a JSON array of diagnostics
+def iter_json_array(stream, chunk_size=CHUNK_SIZE):
+    """Yield the items of a top-level JSON array (or a single object) read from `stream` in chunks.
+
+    Only the current item and the unread tail of the last chunk are held in memory.
+    Raises json.JSONDecodeError on malformed input.
+    """
+    decoder = json.JSONDecoder()
+    bytes_decoder = codecs.getincrementaldecoder("utf-8")()
+    buf = ""
+    eof = False
+
+    def read_more(size=chunk_size):
+        nonlocal buf, eof
+        raw = stream.read(size)
+        # The decoder may hold back a partial multibyte character, so EOF is judged on the raw chunk
+        chunk = bytes_decoder.decode(raw, final=not raw) if isinstance(raw, bytes) else raw
+        if not raw:
+            eof = True
+        buf += chunk
+
+    def skip_ws():
+        nonlocal buf
+        while True:
+            buf = buf.lstrip()
+            if buf or eof:
+                return
+            read_more()
+
+    def decode_value():
+        nonlocal buf
+        # Each retry re-scans the buffer, so reads double while the value is incomplete
+        # to keep the total work linear in the value's size
+        size = chunk_size
+        while True:
+            try:
+                value, end = decoder.raw_decode(buf)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                read_more(size)
+                size *= 2
+                continue
+            # A number followed only by number characters up to the buffer edge may continue
+            # in the next chunk (e.g. "1" + "2", or "1." + "5")
+            if isinstance(value, (int, float)) and not eof and not buf[end:].lstrip(NUMBER_CHARS):
+                read_more(size)
+                size *= 2
+                continue
+            buf = buf[end:]
+            return value
+
+    skip_ws()
+    if not buf:
+        raise json.JSONDecodeError("Expecting value", buf, 0)
+    if buf[0] != "[":
+        value = decode_value()
+        skip_ws()
+        if buf:
+            raise json.JSONDecodeError("Extra data", buf, 0)
+        yield value
+        return
+
+    buf = buf[1:]
+    expect_item = True
+    first = True
+    while True:
+        skip_ws()
+        if not buf:
+            raise json.JSONDecodeError("Unterminated array", buf, 0)
+        if buf[0] == "]" and (first or not expect_item):
+            buf = buf[1:]
+            break
+        if not expect_item:
+            if buf[0] != ",":
+                raise json.JSONDecodeError("Expecting ',' delimiter", buf, 0)
+            buf = buf[1:]
+            expect_item = True
+            continue
+        yield decode_value()
+        expect_item = False
+        first = False
+
+    skip_ws()
+    if buf:
+        raise json.JSONDecodeError("Extra data", buf, 0)
+
+
+def preview_entry(log, rendered, chars):
+    def clip(value):
+        if value is None or isinstance(value, bool):
+            return value
+        text = json.dumps(value) if not isinstance(value, str) else value
+        if isinstance(value, (int, float)) and len(text) <= chars:
+            return value
+        return text[:chars]
+
+    if isinstance(log, dict):
+        preview = {k: clip(log[k]) for k in PREVIEW_FIELDS if k in log}
+        preview["message"] = clip(log.get("message", ""))
+    else:
+        preview = {"preview": rendered[:chars]}
+    preview["truncated"] = f"{len(rendered)} characters, preview only"
+    return preview
+
+
+# Render one diagnostic, falling back to a preview when it can't fit in a prompt
+def render_entry(log, limit, preview_chars=PREVIEW_CHARS):
+    rendered = json.dumps(log, indent=2)
+    if len(rendered) <= limit:
+        return rendered, False
+    # Cut the preview's strings until it fits, so the serialized JSON stays valid
+    while True:
+        text = json.dumps(preview_entry(log, rendered, preview_chars), indent=2)
+        if len(text) <= limit or preview_chars == 0:
+            return text, True
+        preview_chars //= 2
+
+
+def log_file(log):
+    if isinstance(log, dict):
+        return str(log.get("resource") or log.get("file") or "unknown file")
+    return "unknown file"
+
+
+def file_label(name):
+    label = name.split("/")[-1]
+    return label if len(label) <= MAX_FILE_LABEL else label[:MAX_FILE_LABEL - 3] + "..."
+
+
+def render_prompt(groups):
+    entries = ",\n".join(entry for _, group in groups for entry in group)
+    formatted_logs = LOGS_TEMPLATE.replace("{entries}", entries)
+    files_str = ", ".join(f"`{file_label(name)}`" for name, _ in groups)
+    return PROMPT_TEMPLATE.format(formatted_logs=formatted_logs, files=files_str)
+
+
+# Group diagnostics by file and pack them into prompts of at most `max_chars` characters
+def build_prompts(logs, max_chars=DEFAULT_PROMPT_LIMIT):
+    """Yield dicts with `files`, `count`, `truncated` and `text` for each copy-ready prompt."""
+    overhead = len(render_prompt([]))
+    budget = max_chars - overhead
+    if budget <= PREVIEW_CHARS * 2:
+        raise ValueError(f"Prompt size limit must be larger than {overhead + PREVIEW_CHARS * 2} characters.")
+
+    pending = OrderedDict()  # file -> [entries, size, truncated count]
+    pending_size = 0
+
+    def group_cost(name, size, count):
+        # Entries, their ",\n" separators and the file label in the instruction line
+        return size + 2 * count + len(file_label(name)) + 4
+
+    def pack(groups):
+        batch, batch_size = [], 0
+        for name, (entries, size, truncated) in groups:
+            cost = group_cost(name, size, len(entries))
+            if batch and batch_size + cost > budget:
+                yield flush(batch)
+                batch, batch_size = [], 0
+            batch.append((name, entries, truncated))
+            batch_size += cost
+        if batch:
+            yield flush(batch)
+
+    def flush(batch):
+        return {
+            "files": [name for name, _, _ in batch],
+            "count": sum(len(entries) for _, entries, _ in batch),
+            "truncated": sum(truncated for _, _, truncated in batch),
+            "text": render_prompt([(name, entries) for name, entries, _ in batch]),
+        }
+
+    for log in logs:
+        name = log_file(log)
+        entry, truncated = render_entry(log, budget - group_cost(name, 0, 1))
+        group = pending.setdefault(name, [[], 0, 0])
+        if group[0] and group_cost(name, group[1] + len(entry), len(group[0]) + 1) > budget:
+            # This file alone fills a prompt
+            pending_size -= group[1]
+            yield from pack([(name, pending.pop(name))])
+            group = pending.setdefault(name, [[], 0, 0])
+        group[0].append(entry)
+        group[1] += len(entry)
+        group[2] += truncated
+        pending_size += len(entry)
+
+        if pending_size > budget * PENDING_PROMPTS:
+            # Too many files held open: pack the oldest groups to keep memory bounded
+            oldest = []
+            while pending and pending_size > budget:
+                old_name, old_group = pending.popitem(last=False)
+                pending_size -= old_group[1]
+                oldest.append((old_name, old_group))
+            yield from pack(oldest)
+
+    yield from pack(list(pending.items()))
+
+
+# Parse logs
+def format_logs(raw_input):
+    if not raw_input.strip():
+        return "", []
+    
+    extracted_logs = []
+    log_blocks = re.split(r'\n\s*\n', raw_input.strip())
+    for block in log_blocks:
+        block = block.strip()
+        if not block:
+            continue
+        try:
+            # Parse JSON logs (TypeScript/Next.js)
+            parsed = json.loads(block)
+            if isinstance(parsed, list):
+                extracted_logs.extend([log for log in parsed if isinstance(log, dict) and all(k in log for k in ['code', 'message', 'resource'])])
+            elif isinstance(parsed, dict) and all(k in parsed for k in ['code', 'message', 'resource']):
+                extracted_logs.append(parsed)
+        except json.JSONDecodeError:
+            # Parse console logs (Streamlit/Python)
+            lines = block.splitlines()
+            # Equivalent to the old "line not in lines[:lines.index(line)]" check, which was always
+            # true when it didn't raise, without its quadratic cost on long blocks
+            raw_lines = set(lines)
+            error_info = {}
+            for line in lines:
+                line = line.strip()
+                if not line:
+                    continue
+                file_match = re.search(r'File "([^"]+)", line (\d+)', line)
+                if file_match:
+                    error_info['file'] = file_match.group(1).split('/')[-1]
+                    error_info['line'] = file_match.group(2)
+                # \b keeps the search linear; without it every position of a long word is retried
+                error_match = re.search(r'\b(\w+Error): (.+)', line)
+                if error_match:
+                    error_info['code'] = error_match.group(1)
+                    error_info['message'] = error_match.group(2)
+                code_match = re.search(r'^\s*(.+)$', line)
+                if code_match and 'code' in error_info and line in raw_lines:
+                    error_info['snippet'] = code_match.group(1)
+            if error_info.get('file') and error_info.get('code'):
+                extracted_logs.append(error_info)
+    
+    if not extracted_logs:
+        return "", []
+    
+    formatted_json = json.dumps(extracted_logs, indent=2)
+    formatted_logs_md = f"""```json\n{formatted_json}\n```"""
+    return formatted_logs_md, extracted_logs
+
+# Extract files and error details
+def extract_info_from_logs(logs):
+    files = set()
+    errors = []
+    module_pattern = re.compile(r"Cannot find module '([^']+)'")
+    identifier_pattern = re.compile(r"Cannot find name '([^']+)'|`([^`]+)`")
+    async_pattern = re.compile(r"'await' expressions are only allowed")
+
+    for log in logs:
+        file_name = log.get('file') or log.get('resource', '').split('/')[-1]
+        if file_name:
+            files.add(file_name)
+        
+        error_info = {
+            'file': file_name,
+            'code': log.get('code', ''),
+            'message': log.get('message', ''),
+            'line': log.get('startLineNumber') or log.get('line', ''),
+            'snippet': log.get('snippet', ''),
+            'related': log.get('relatedInformation', []),
+            'module_path': None,
+            'identifier': None,
+            'async_issue': False
+        }
+        
+        # Extract module paths
+        module_match = module_pattern.search(log.get('message', ''))
+        if module_match:
+            error_info['module_path'] = module_match.group(1)
+        
+        # Extract identifiers
+        identifier_match = identifier_pattern.search(log.get('message', ''))
+        if identifier_match:
+            error_info['identifier'] = identifier_match.group(1) or identifier_match.group(2)
+        
+        # Detect async issues
+        if async_pattern.search(log.get('message', '')):
+            error_info['async_issue'] = True
+        
+        errors.append(error_info)
+    
+    return sorted(list(files)), errors
+
+# Generate AI prompt
+def generate_prompt(formatted_logs_md, files, errors, additional_instructions):
+    files_str = ", ".join(files) if files else "the provided files"
+    
+    prompt_parts = [
+        f"You are an expert developer for Next.js, React, and TypeScript. Analyze the provided error logs and instructions to identify and fix issues in {files_str}, a Next.js project potentially using Upstash Redis/Vector with .env configuration.",
+        "For each error, follow these steps:\n",
+        f"1. **Analyze Error**: Determine the root cause based on the error code, message, line number, and snippet (if available) in {files_str}. Consider Next.js-specific issues (e.g., module imports, path aliases, API routes, TypeScript configuration).",
+        "2. **Plan Fix**: Outline a solution compatible with Next.js and TypeScript. Check for:\n"
+        "- Missing files or incorrect import paths.\n"
+        "- `tsconfig.json` misconfigurations (e.g., `baseUrl`, `paths`).\n"
+        "- Missing dependencies or exports.\n"
+        "- Avoid hardcoding specific implementations; propose flexible solutions.",
+        "3. **Code Changes**: Provide TypeScript code snippets (```typescript) to fix the error. Include:\n"
+        "- File creation with minimal, context-appropriate code.\n"
+        "- Correct import statements or path adjustments.\n"
+        "- Dependency installations if applicable.\n"
+        "- Suggestions for `tsconfig.json` updates if relevant.",
+        f"4. **Verify Changes**: Explain how the fix resolves the error and ensures compatibility with {files_str}. Address impacts on Next.js API routes, React components, or Upstash integration. State assumptions if context is missing.",
+        f"5. **Placement**: Specify where to apply changes in {files_str}, new files, or `tsconfig.json`. Provide commands to verify fixes (e.g., `tsc`, `next build`)."
+    ]
+    
+    if formatted_logs_md:
+        prompt_parts.append("\n### Error Logs\n")
+        prompt_parts.append(formatted_logs_md)
+    
+    if additional_instructions:
+        prompt_parts.append("\n### Instructions\n")
+        prompt_parts.append(f"```\n{additional_instructions.strip()}\n```\n")
+    
+    return "".join(prompt_parts)
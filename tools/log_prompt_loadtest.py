@@ -0,0 +1,171 @@
+"""Load test for log_prompt_server.py.
+
+Sends the same request from several keep-alive client threads and reports
+requests per second, latency percentiles and the time requests waited for a
+server worker (from the X-Queue-Wait-Ms response header):
+
+    python tools/log_prompt_loadtest.py --spawn --endpoint /prompts --requests 2000 --concurrency 16
+    python tools/log_prompt_loadtest.py --url http://127.0.0.1:8765 --endpoint /errors --body logs.txt --chunked
+
+Without --body, a synthetic array of TypeScript diagnostics is sent.
+"""
+import argparse
+import http.client
+import json
+import math
+import os
+import subprocess
+import sys
+import threading
+import time
+from urllib.parse import urlsplit
+
+DEFAULT_URL = "http://127.0.0.1:8765"
+# Chunk size used when sending the body with Transfer-Encoding: chunked
+SEND_CHUNK = 16 * 1024
+
+
+def synthetic_diagnostics(count, files=10):
+    logs = []
+    for i in range(count):
+        logs.append({
+            "resource": f"/project/lib/module{i % files}.ts",
+            "owner": "typescript",
+            "code": "2304",
+            "severity": 8,
+            "message": f"Cannot find name 'value{i}'.",
+            "source": "ts",
+            "startLineNumber": i + 1,
+            "startColumn": 5,
+            "endLineNumber": i + 1,
+            "endColumn": 12,
+        })
+    return json.dumps(logs).encode()
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = max(0, math.ceil(pct / 100 * len(sorted_values)) - 1)
+    return sorted_values[index]
+
+
+def run_client(host, port, path, body, chunked, count, results, lock):
+    conn = http.client.HTTPConnection(host, port, timeout=30)
+    latencies, queue_waits, statuses = [], [], {}
+    for _ in range(count):
+        start = time.perf_counter()
+        try:
+            if chunked:
+                chunks = (body[i:i + SEND_CHUNK] for i in range(0, len(body), SEND_CHUNK))
+                conn.request("POST", path, body=chunks, encode_chunked=True,
+                             headers={"Transfer-Encoding": "chunked"})
+            else:
+                conn.request("POST", path, body=body)
+            response = conn.getresponse()
+            response.read()
+            status = response.status
+            queue_wait = response.getheader("X-Queue-Wait-Ms")
+            if queue_wait is not None:
+                queue_waits.append(float(queue_wait) / 1000)
+            if response.will_close:
+                conn.close()
+        except (OSError, http.client.HTTPException):
+            status = "error"
+            conn.close()
+        latencies.append(time.perf_counter() - start)
+        statuses[status] = statuses.get(status, 0) + 1
+    conn.close()
+    with lock:
+        results["latencies"].extend(latencies)
+        results["queue_waits"].extend(queue_waits)
+        for status, n in statuses.items():
+            results["statuses"][status] = results["statuses"].get(status, 0) + n
+
+
+def wait_for_server(host, port, timeout=10):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection(host, port, timeout=1)
+            conn.request("GET", "/health")
+            if conn.getresponse().status == 200:
+                conn.close()
+                return
+        except OSError:
+            pass
+        time.sleep(0.1)
+    raise RuntimeError(f"Server at {host}:{port} did not become ready within {timeout}s.")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure throughput and latency of log_prompt_server.py.")
+    parser.add_argument("--url", default=DEFAULT_URL, help=f"Server base URL (default: {DEFAULT_URL}).")
+    parser.add_argument("--endpoint", default="/prompts", help="Endpoint to POST to (default: /prompts).")
+    parser.add_argument("--body", help="File to send as the request body.")
+    parser.add_argument("--diagnostics", type=int, default=200,
+                        help="Synthetic diagnostics per request when --body is not given.")
+    parser.add_argument("--requests", type=int, default=1000, help="Total requests to send.")
+    parser.add_argument("--concurrency", type=int, default=16,
+                        help="Concurrent client connections; keep it above the server's workers to measure queueing.")
+    parser.add_argument("--chunked", action="store_true", help="Send bodies with Transfer-Encoding: chunked.")
+    parser.add_argument("--spawn", action="store_true", help="Start a local server for the duration of the test.")
+    parser.add_argument("--workers", type=int, default=8, help="Server worker threads when using --spawn.")
+    parser.add_argument("--queue", type=int, default=32, help="Server queue size when using --spawn.")
+    args = parser.parse_args(argv)
+
+    url = urlsplit(args.url)
+    host, port = url.hostname or "127.0.0.1", url.port or 80
+    if args.body:
+        with open(args.body, "rb") as f:
+            body = f.read()
+    else:
+        body = synthetic_diagnostics(args.diagnostics)
+
+    server = None
+    if args.spawn:
+        server_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "log_prompt_server.py")
+        server = subprocess.Popen([
+            sys.executable, server_path, "--host", host, "--port", str(port),
+            "--workers", str(args.workers), "--queue", str(args.queue),
+        ])
+    try:
+        wait_for_server(host, port)
+
+        per_client = [args.requests // args.concurrency] * args.concurrency
+        for i in range(args.requests % args.concurrency):
+            per_client[i] += 1
+        results = {"latencies": [], "queue_waits": [], "statuses": {}}
+        lock = threading.Lock()
+        threads = [
+            threading.Thread(target=run_client,
+                             args=(host, port, args.endpoint, body, args.chunked, n, results, lock))
+            for n in per_client if n
+        ]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    latencies = sorted(results["latencies"])
+    ok = results["statuses"].get(200, 0)
+    print(f"Endpoint:     POST {args.endpoint} ({len(body)} byte body{', chunked' if args.chunked else ''})")
+    print(f"Requests:     {len(latencies)} in {elapsed:.2f}s with {args.concurrency} connections")
+    print(f"Statuses:     {', '.join(f'{k}: {v}' for k, v in sorted(results['statuses'].items(), key=str))}")
+    print(f"Throughput:   {len(latencies) / elapsed:.1f} req/s ({ok / elapsed:.1f} successful req/s)")
+    print("Latency (ms): p50 {:.1f}  p90 {:.1f}  p99 {:.1f}  max {:.1f}".format(
+        *(percentile(latencies, p) * 1000 for p in (50, 90, 99, 100))))
+    queue_waits = sorted(results["queue_waits"])
+    print("Queue wait (ms): p50 {:.1f}  p90 {:.1f}  p99 {:.1f}  max {:.1f}".format(
+        *(percentile(queue_waits, p) * 1000 for p in (50, 90, 99, 100))))
+    return 0 if ok == len(latencies) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
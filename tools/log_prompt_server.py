@@ -0,0 +1,568 @@
+"""Local HTTP service for turning error logs into AI prompts.
+
+Exposes the log parsing, error extraction and prompt building from log_prompt.py
+(the logic behind AI_debugger.py and error_to_ai_prompt.py) so CI jobs and IDE
+plugins can reuse one long-lived process instead of starting Python per failure:
+
+    python tools/log_prompt_server.py --port 8765 --workers 8 --queue 32
+
+Endpoints (request bodies may be sent with Content-Length or Transfer-Encoding: chunked):
+
+    GET  /health        Liveness and worker pool usage.
+    POST /logs          Raw logs -> {"count", "logs"}.
+    POST /errors        Raw logs -> {"count", "files", "errors"}.
+    POST /debug-prompt  Raw logs, or an application/json body {"logs": ..., "instructions": ...}
+                        -> {"count", "files", "prompt"}.
+    POST /prompts       JSON array of diagnostics -> {"count", "truncated", "prompts"};
+                        optional ?max_chars=N. The body is parsed as it arrives.
+
+The first three endpoints read the whole body before parsing it, so they accept at most
+--max-text-body bytes (1 MiB by default); /prompts accepts up to --max-body.
+
+Requests are served by a fixed pool of worker threads, one request at a time. Idle
+keep-alive connections wait in a selector and hold no worker. When `workers + queue`
+requests are already queued or running, new ones are answered with 503 and Retry-After.
+Each response reports the time it waited for a worker in an X-Queue-Wait-Ms header.
+"""
+import argparse
+import io
+import json
+import selectors
+import socket
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from queue import Empty, SimpleQueue
+from urllib.parse import parse_qs, urlsplit
+
+from log_prompt import (
+    DEFAULT_PROMPT_LIMIT,
+    build_prompts,
+    extract_info_from_logs,
+    format_logs,
+    generate_prompt,
+    iter_json_array,
+)
+
+DEFAULT_PORT = 8765
+DEFAULT_WORKERS = 8
+DEFAULT_QUEUE = 32
+# Largest request body accepted, streamed or not
+MAX_BODY_BYTES = 64 * 1024 * 1024
+# Largest body for /logs, /errors and /debug-prompt, which load it whole before parsing
+MAX_TEXT_BODY_BYTES = 1024 * 1024
+# Longest chunk-size or trailer line accepted in a chunked body
+MAX_LINE_BYTES = 1024
+# Idle keep-alive connections are closed after this many seconds
+KEEPALIVE_TIMEOUT = 5
+# Total seconds a client gets to send the request line and headers, however slowly it trickles them
+HEADER_TIMEOUT = 2
+# Total seconds a client gets to send the request body
+BODY_TIMEOUT = 10
+# Seconds a worker waits for each write of a response
+RESPONSE_TIMEOUT = 10
+# Most idle keep-alive connections held open at once
+MAX_IDLE_CONNECTIONS = 1024
+# Seconds between sweeps for expired idle connections
+IDLE_SWEEP_INTERVAL = 0.5
+# Most bytes read from a rejected connection before answering 503
+MAX_DRAIN_BYTES = 1024 * 1024
+
+BUSY_RESPONSE = json.dumps({"error": "Server busy, retry later."}).encode()
+
+
+class RequestError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+# Readers for request bodies; both expose read(size) and enforce the body size limit
+class LengthReader:
+    def __init__(self, rfile, length, limit):
+        if length > limit:
+            raise RequestError(413, f"Request body larger than {limit} bytes.")
+        self.rfile = rfile
+        self.remaining = length
+
+    @property
+    def done(self):
+        return self.remaining == 0
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.rfile.read(size) if size else b""
+        if len(data) < size:
+            raise RequestError(400, "Request body ended early.")
+        self.remaining -= len(data)
+        return data
+
+
+class ChunkedReader:
+    def __init__(self, rfile, limit):
+        self.rfile = rfile
+        self.limit = limit
+        self.total = 0
+        self.remaining = 0
+        self.done = False
+
+    def _read_line(self):
+        line = self.rfile.readline(MAX_LINE_BYTES + 1)
+        if not line.endswith(b"\n"):
+            raise RequestError(400, "Malformed chunked body.")
+        return line
+
+    def _next_chunk(self):
+        try:
+            self.remaining = int(self._read_line().split(b";", 1)[0].strip(), 16)
+        except ValueError:
+            raise RequestError(400, "Malformed chunk size.")
+        self.total += self.remaining
+        if self.total > self.limit:
+            raise RequestError(413, f"Request body larger than {self.limit} bytes.")
+        if self.remaining == 0:
+            # Skip any trailer headers
+            while self._read_line().strip():
+                pass
+            self.done = True
+
+    def read(self, size=-1):
+        parts = []
+        wanted = size
+        while not self.done and wanted != 0:
+            if self.remaining == 0:
+                self._next_chunk()
+                continue
+            n = self.remaining if wanted < 0 else min(self.remaining, wanted)
+            data = self.rfile.read(n)
+            if len(data) < n:
+                raise RequestError(400, "Request body ended early.")
+            parts.append(data)
+            self.remaining -= n
+            if wanted > 0:
+                wanted -= n
+            if self.remaining == 0 and self.rfile.read(2) != b"\r\n":
+                raise RequestError(400, "Malformed chunked body.")
+        return b"".join(parts)
+
+
+class DeadlineSocketIO(socket.SocketIO):
+    """Socket reader that fails once the connection's read deadline has passed.
+
+    A socket timeout only bounds each recv, so a client sending a byte at a time
+    could otherwise hold a worker indefinitely.
+    """
+
+    def __init__(self, conn):
+        super().__init__(conn.sock, "rb")
+        self.conn = conn
+
+    def readinto(self, b):
+        if self.conn.deadline is not None:
+            remaining = self.conn.deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError("Request deadline passed.")
+            self.conn.sock.settimeout(remaining)
+        return super().readinto(b)
+
+
+class Connection:
+    """A client socket and its read buffer, kept across keep-alive requests."""
+
+    def __init__(self, sock, address):
+        self.sock = sock
+        self.address = address
+        # Set by the handler while a request is read; None while parked
+        self.deadline = None
+        self.rfile = io.BufferedReader(DeadlineSocketIO(self))
+        self.idle_since = time.monotonic()
+        self.queued_at = self.idle_since
+        self.holds_slot = False
+
+    def has_buffered_data(self):
+        # A pipelined request may already sit in the read buffer, where the selector can't see it
+        try:
+            self.sock.setblocking(False)
+            try:
+                return bool(self.rfile.peek(1))
+            finally:
+                self.sock.setblocking(True)
+        except OSError:
+            return False
+
+    def close(self):
+        self.rfile.close()
+        try:
+            self.sock.shutdown(socket.SHUT_WR)
+        except OSError:
+            pass
+        self.sock.close()
+
+
+class LogPromptHandler(BaseHTTPRequestHandler):
+    """Handles one request per dispatch; the server parks keep-alive connections in between."""
+
+    protocol_version = "HTTP/1.1"
+    server_version = "LogPromptServer/1.0"
+
+    routes = {
+        ("GET", "/health"): "handle_health",
+        ("POST", "/logs"): "handle_logs",
+        ("POST", "/errors"): "handle_errors",
+        ("POST", "/debug-prompt"): "handle_debug_prompt",
+        ("POST", "/prompts"): "handle_prompts",
+    }
+
+    def setup(self):
+        self.conn = self.request
+        self.connection = self.conn.sock
+        self.conn.deadline = time.monotonic() + HEADER_TIMEOUT
+        self.rfile = self.conn.rfile
+        self.wfile = self.connection.makefile("wb")
+        self.queue_wait = time.monotonic() - self.conn.queued_at
+
+    def handle(self):
+        self.close_connection = True
+        self.handle_one_request()
+
+    def finish(self):
+        # The read buffer belongs to the connection and outlives this request
+        self.conn.deadline = None
+        try:
+            self.wfile.flush()
+        except OSError:
+            self.close_connection = True
+        self.wfile.close()
+
+    def do_GET(self):
+        self.dispatch("GET")
+
+    def do_POST(self):
+        self.dispatch("POST")
+
+    def dispatch(self, method):
+        url = urlsplit(self.path)
+        self.query = parse_qs(url.query)
+        self.body = None
+        try:
+            name = self.routes.get((method, url.path))
+            if name is None:
+                raise RequestError(404, f"No endpoint for {method} {url.path}.")
+            self.send_json(200, getattr(self, name)())
+        except RequestError as e:
+            self.send_json(e.status, {"error": str(e)})
+        except json.JSONDecodeError as e:
+            self.send_json(400, {"error": f"Invalid JSON: {e.msg}."})
+        except ValueError as e:
+            self.send_json(400, {"error": str(e)})
+        except TimeoutError:
+            self.send_json(408, {"error": "Request body not received in time."})
+        except Exception as e:
+            self.log_error("Unhandled error: %r", e)
+            self.send_json(500, {"error": "Internal server error."})
+
+    def body_reader(self, limit=None):
+        limit = self.server.max_body if limit is None else min(limit, self.server.max_body)
+        self.conn.deadline = time.monotonic() + BODY_TIMEOUT
+        if "chunked" in self.headers.get("Transfer-Encoding", "").lower():
+            self.body = ChunkedReader(self.rfile, limit)
+        else:
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+            except ValueError:
+                length = -1
+            if length < 0:
+                raise RequestError(400, "Invalid Content-Length.")
+            self.body = LengthReader(self.rfile, length, limit)
+        return self.body
+
+    def read_text(self):
+        return self.body_reader(self.server.max_text_body).read().decode("utf-8", errors="replace")
+
+    def body_pending(self):
+        if self.body is None:
+            return self.command == "POST"
+        return not self.body.done
+
+    def send_json(self, status, payload):
+        data = json.dumps(payload).encode()
+        # A partly read body leaves the connection out of sync, so don't reuse it
+        if self.body_pending():
+            self.close_connection = True
+        self.connection.settimeout(RESPONSE_TIMEOUT)
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.send_header("X-Queue-Wait-Ms", f"{self.queue_wait * 1000:.1f}")
+        if self.close_connection:
+            self.send_header("Connection", "close")
+        self.end_headers()
+        self.wfile.write(data)
+        # Free the worker slot before the final flush, so a client that sends its
+        # next request as soon as it has this response isn't turned away
+        self.server.release_slot(self.conn)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    # Endpoints
+    def handle_health(self):
+        return {"status": "ok", **self.server.stats()}
+
+    def handle_logs(self):
+        _, logs = format_logs(self.read_text())
+        return {"count": len(logs), "logs": logs}
+
+    def handle_errors(self):
+        _, logs = format_logs(self.read_text())
+        files, errors = extract_info_from_logs(logs)
+        return {"count": len(logs), "files": files, "errors": errors}
+
+    def handle_debug_prompt(self):
+        raw_input, instructions = self.read_text(), ""
+        if self.headers.get_content_type() == "application/json":
+            request = json.loads(raw_input)
+            if not isinstance(request, dict):
+                raise RequestError(400, 'Expected a JSON object with "logs" and "instructions".')
+            raw_input = request.get("logs") or ""
+            instructions = request.get("instructions") or ""
+            if not isinstance(raw_input, str) or not isinstance(instructions, str):
+                raise RequestError(400, '"logs" and "instructions" must be strings.')
+        if not raw_input.strip() and not instructions.strip():
+            raise RequestError(400, "Provide error logs or instructions.")
+        formatted_logs_md, logs = format_logs(raw_input)
+        files, errors = extract_info_from_logs(logs)
+        prompt = generate_prompt(formatted_logs_md, files, errors, instructions)
+        return {"count": len(logs), "files": files, "prompt": prompt}
+
+    def handle_prompts(self):
+        try:
+            max_chars = int(self.query.get("max_chars", [DEFAULT_PROMPT_LIMIT])[0])
+        except ValueError:
+            raise RequestError(400, "max_chars must be an integer.")
+        prompts = list(build_prompts(iter_json_array(self.body_reader()), max_chars))
+        return {
+            "count": sum(p["count"] for p in prompts),
+            "truncated": sum(p["truncated"] for p in prompts),
+            "prompts": prompts,
+        }
+
+
+class LogPromptServer(HTTPServer):
+    """HTTPServer that runs each request on a bounded thread pool and sheds load when full.
+
+    Accepted and keep-alive connections are watched by a selector thread and only take
+    a worker slot once they have a request to read.
+    """
+
+    request_queue_size = 128
+
+    def __init__(self, address, handler=LogPromptHandler, workers=DEFAULT_WORKERS,
+                 queue=DEFAULT_QUEUE, max_body=MAX_BODY_BYTES, max_text_body=MAX_TEXT_BODY_BYTES,
+                 verbose=False):
+        super().__init__(address, handler)
+        self.workers = workers
+        self.capacity = workers + queue
+        self.max_body = max_body
+        self.max_text_body = max_text_body
+        self.verbose = verbose
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="log-prompt")
+        self.slots = threading.BoundedSemaphore(self.capacity)
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.idle = 0
+        self.rejected = 0
+        self.closing = False
+        self.selector = selectors.DefaultSelector()
+        self.incoming = SimpleQueue()
+        self.wakeup_r, self.wakeup_w = socket.socketpair()
+        self.wakeup_r.setblocking(False)
+        self.wakeup_w.setblocking(False)
+        self.selector.register(self.wakeup_r, selectors.EVENT_READ)
+        self.watcher = threading.Thread(target=self.watch_connections, name="log-prompt-idle", daemon=True)
+        self.watcher.start()
+
+    def stats(self):
+        with self.lock:
+            return {
+                "workers": self.workers,
+                "capacity": self.capacity,
+                "in_flight": self.in_flight,
+                "idle": self.idle,
+                "rejected": self.rejected,
+            }
+
+    def process_request(self, request, client_address):
+        self.park(Connection(request, client_address))
+
+    def park(self, conn):
+        if conn.has_buffered_data():
+            self.dispatch(conn)
+            return
+        conn.idle_since = time.monotonic()
+        self.incoming.put(conn)
+        self.wake()
+
+    def wake(self):
+        try:
+            self.wakeup_w.send(b"\0")
+        except OSError:
+            # The buffer is full, so a wakeup is already pending
+            pass
+
+    def watch_connections(self):
+        next_sweep = time.monotonic() + IDLE_SWEEP_INTERVAL
+        while not self.closing:
+            for key, _ in self.selector.select(timeout=IDLE_SWEEP_INTERVAL):
+                if key.data is None:
+                    try:
+                        self.wakeup_r.recv(4096)
+                    except OSError:
+                        pass
+                    continue
+                self.unwatch(key.data)
+                self.dispatch(key.data)
+
+            while True:
+                try:
+                    conn = self.incoming.get_nowait()
+                except Empty:
+                    break
+                if self.closing or self.idle >= MAX_IDLE_CONNECTIONS:
+                    conn.close()
+                    continue
+                self.selector.register(conn.sock, selectors.EVENT_READ, conn)
+                with self.lock:
+                    self.idle += 1
+
+            now = time.monotonic()
+            if now >= next_sweep:
+                next_sweep = now + IDLE_SWEEP_INTERVAL
+                for key in list(self.selector.get_map().values()):
+                    if key.data is not None and now - key.data.idle_since > KEEPALIVE_TIMEOUT:
+                        self.unwatch(key.data)
+                        key.data.close()
+
+    def unwatch(self, conn):
+        self.selector.unregister(conn.sock)
+        with self.lock:
+            self.idle -= 1
+
+    def dispatch(self, conn):
+        if not self.slots.acquire(blocking=False):
+            with self.lock:
+                self.rejected += 1
+            self.reject(conn.sock)
+            conn.close()
+            return
+        with self.lock:
+            self.in_flight += 1
+        conn.holds_slot = True
+        conn.queued_at = time.monotonic()
+        self.pool.submit(self.process_connection, conn)
+
+    def release_slot(self, conn):
+        if not conn.holds_slot:
+            return
+        conn.holds_slot = False
+        with self.lock:
+            self.in_flight -= 1
+        self.slots.release()
+
+    def process_connection(self, conn):
+        keep_alive = False
+        try:
+            handler = self.RequestHandlerClass(conn, conn.address, self)
+            keep_alive = not handler.close_connection
+        except Exception:
+            self.handle_error(conn.sock, conn.address)
+        finally:
+            self.release_slot(conn)
+        if keep_alive and not self.closing:
+            self.park(conn)
+        else:
+            conn.close()
+
+    def reject(self, request):
+        head = (
+            "HTTP/1.1 503 Service Unavailable\r\n"
+            "Content-Type: application/json\r\n"
+            "Retry-After: 1\r\n"
+            "Connection: close\r\n"
+            f"Content-Length: {len(BUSY_RESPONSE)}\r\n\r\n"
+        )
+        # Runs on the selector thread, so nothing here may wait on the client
+        try:
+            request.setblocking(False)
+            # Drain what the client already sent so closing doesn't reset the connection
+            try:
+                drained = 0
+                while drained < MAX_DRAIN_BYTES:
+                    data = request.recv(65536)
+                    if not data:
+                        break
+                    drained += len(data)
+            except (BlockingIOError, InterruptedError):
+                pass
+            # The reply fits in any socket send buffer; a client that has let its own
+            # buffer fill up gets the connection closed without it
+            request.send(head.encode() + BUSY_RESPONSE)
+        except OSError:
+            pass
+
+    def server_close(self):
+        super().server_close()
+        self.closing = True
+        self.wake()
+        self.watcher.join()
+        self.pool.shutdown(wait=True)
+        for key in list(self.selector.get_map().values()):
+            if key.data is not None:
+                key.data.close()
+        while True:
+            try:
+                self.incoming.get_nowait().close()
+            except Empty:
+                break
+        self.selector.close()
+        self.wakeup_r.close()
+        self.wakeup_w.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve log parsing and AI prompt generation over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to bind (default: 127.0.0.1).")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"Port to listen on (default: {DEFAULT_PORT}).")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Worker threads serving requests.")
+    parser.add_argument("--queue", type=int, default=DEFAULT_QUEUE,
+                        help="Requests allowed to wait for a worker before new ones get 503.")
+    parser.add_argument("--max-body", type=int, default=MAX_BODY_BYTES, help="Largest request body in bytes.")
+    parser.add_argument("--max-text-body", type=int, default=MAX_TEXT_BODY_BYTES,
+                        help="Largest body in bytes for /logs, /errors and /debug-prompt.")
+    parser.add_argument("--verbose", action="store_true", help="Log every request.")
+    args = parser.parse_args(argv)
+
+    server = LogPromptServer(
+        (args.host, args.port),
+        workers=args.workers,
+        queue=args.queue,
+        max_body=args.max_body,
+        max_text_body=args.max_text_body,
+        verbose=args.verbose,
+    )
+    host, port = server.server_address[:2]
+    print(f"Serving log prompts on http://{host}:{port} ({args.workers} workers, queue {args.queue})", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,263 @@
+import io
+import json
+import time
+
+import pytest
+
+from log_prompt import (
+    DEFAULT_PROMPT_LIMIT,
+    MAX_FILE_LABEL,
+    PREVIEW_CHARS,
+    build_prompts,
+    extract_info_from_logs,
+    format_logs,
+    generate_prompt,
+    iter_json_array,
+)
+
+MIXED = '[{"resource": "/a/llm.ts", "message": "é \\"q\\" ]"}, 1.5, -2e-3, 10, true, null, "x,]", [1, [2]], {}]'
+
+
+class SplitStream:
+    """Return `data` in two non-empty reads split at `cut`, then EOF."""
+
+    def __init__(self, data, cut):
+        self.parts = [data[:cut], data[cut:]]
+        self.empty = data[:0]
+
+    def read(self, size=-1):
+        return self.parts.pop(0) if self.parts else self.empty
+
+
+def parse(stream, chunk_size=64 * 1024):
+    return list(iter_json_array(stream, chunk_size))
+
+
+@pytest.mark.parametrize("data", [MIXED, MIXED.encode()])
+def test_every_split_point(data):
+    expected = json.loads(MIXED)
+    for cut in range(1, len(data)):
+        assert parse(SplitStream(data, cut)) == expected, cut
+
+
+@pytest.mark.parametrize("data", [MIXED, MIXED.encode()])
+def test_every_chunk_size(data):
+    expected = json.loads(MIXED)
+    wrap = io.BytesIO if isinstance(data, bytes) else io.StringIO
+    for chunk_size in range(1, len(data) + 2):
+        assert parse(wrap(data), chunk_size) == expected, chunk_size
+
+
+def test_number_at_default_chunk_boundary():
+    text = '["' + "a" * (64 * 1024 - 7) + '", 1.5]'
+    assert text[:64 * 1024].endswith("1.")
+    assert parse(io.StringIO(text))[1] == 1.5
+
+
+class CountingStream(io.StringIO):
+    reads = 0
+
+    def read(self, size=-1):
+        self.reads += 1
+        return super().read(size)
+
+
+@pytest.mark.parametrize("template", ['[{{"message": "{}"}}, 1]', '{{"message": "{}"}}'])
+def test_large_single_item(template):
+    message = "x" * (8 * 1024 * 1024)
+    stream = CountingStream(template.format(message))
+    items = parse(stream)
+    assert items[0] == {"message": message}
+    # 128 chunks' worth of data is fetched with geometrically growing reads, not one read per chunk
+    assert stream.reads <= 12
+
+
+def test_multibyte_character_split_across_chunks():
+    assert parse(io.BytesIO('["é"]'.encode()), 1) == ["é"]
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("[]", []),
+    ("  [ ]  ", []),
+    ('{"a": 1}', [{"a": 1}]),
+    ("[1, 2 ,3]", [1, 2, 3]),
+])
+def test_valid_input(text, expected):
+    for chunk_size in (1, 2, 64):
+        assert parse(io.StringIO(text), chunk_size) == expected
+
+
+@pytest.mark.parametrize("text", ["", "   ", "[", "[1", "[1,", "[1,]", "[,1]", "[1 2]", "[1]]", "[1] x", '{"a": 1} {}', "[1.]", "[tru]", '["a]'])
+def test_malformed_input(text):
+    for chunk_size in (1, 2, 64):
+        with pytest.raises(json.JSONDecodeError):
+            parse(io.StringIO(text), chunk_size)
+
+
+def prompt_entries(prompt):
+    block = prompt["text"].split("```json\n", 1)[1].split("\n```\n\n</details>", 1)[0]
+    return json.loads(block)
+
+
+def diagnostic(resource, line, message="Cannot find name 'x'."):
+    return {"resource": resource, "code": "2304", "message": message, "startLineNumber": line}
+
+
+def check_prompts(logs, max_chars):
+    prompts = list(build_prompts(iter(logs), max_chars))
+    for prompt in prompts:
+        assert len(prompt["text"]) <= max_chars
+        assert len(prompt_entries(prompt)) == prompt["count"]
+    assert sum(p["count"] for p in prompts) == len(logs)
+    return prompts
+
+
+@pytest.mark.parametrize("max_chars", [2700, 4000, 6000, 12000])
+def test_prompts_respect_limit(max_chars):
+    logs = [diagnostic(f"/p/lib/f{i % 7}.ts", i, "m" * (i * 37 % 400)) for i in range(600)]
+    logs += [
+        diagnostic("/p/big.ts", 1, "x" * 50000),
+        diagnostic("/p/" + "r" * 20000, 2),
+        diagnostic("r" * 20000, 3, "y" * 20000),
+        {"resource": "/p/obj.ts", "code": {"value": "2304", "target": "z" * 20000}, "message": "é" * 20000},
+        "a bare string " * 2000,
+        12345,
+    ]
+    prompts = check_prompts(logs, max_chars)
+    assert sum(p["truncated"] for p in prompts) == 5
+
+
+def test_preview_keeps_key_fields():
+    [prompt] = check_prompts([diagnostic("/p/big.ts", 7, "x" * 50000)], 6000)
+    [entry] = prompt_entries(prompt)
+    assert entry["resource"] == "/p/big.ts"
+    assert entry["startLineNumber"] == 7
+    assert entry["message"] == "x" * PREVIEW_CHARS
+    assert "truncated" in entry
+
+
+def test_long_file_name_is_shortened():
+    [prompt] = check_prompts([diagnostic("/p/" + "r" * 20000, 1)], 6000)
+    assert "`" + "r" * (MAX_FILE_LABEL - 3) + "...`" in prompt["text"]
+
+
+def test_prompts_grouped_by_file():
+    logs = [diagnostic(f"/p/f{i % 3}.ts", i) for i in range(30)]
+    prompts = check_prompts(logs, DEFAULT_PROMPT_LIMIT)
+    assert len(prompts) == 1
+    resources = [entry["resource"] for entry in prompt_entries(prompts[0])]
+    assert resources == sorted(resources, key=["/p/f0.ts", "/p/f1.ts", "/p/f2.ts"].index)
+
+
+def test_large_files_split_into_grouped_prompts():
+    logs = [diagnostic(f"/p/f{i % 2}.ts", i, "m" * 200) for i in range(200)]
+    prompts = check_prompts(logs, 4000)
+    assert len(prompts) > 2
+    for prompt in prompts:
+        resources = [entry["resource"] for entry in prompt_entries(prompt)]
+        # Each file's diagnostics form one run, in the order of prompt["files"]
+        runs = [r for i, r in enumerate(resources) if i == 0 or resources[i - 1] != r]
+        assert runs == prompt["files"]
+
+
+def test_placeholders_in_logs_are_kept():
+    [prompt] = check_prompts([diagnostic("/p/a.ts", 1, "{files} {formatted_logs}")], DEFAULT_PROMPT_LIMIT)
+    assert prompt_entries(prompt)[0]["message"] == "{files} {formatted_logs}"
+
+
+def test_limit_too_small():
+    with pytest.raises(ValueError):
+        list(build_prompts(iter([]), 1000))
+
+
+# format_logs and extract_info_from_logs were moved out of AI_debugger.py; these pin their behaviour
+RAW_LOGS = """[{"resource": "/app/lib/llm.ts", "code": "2304", "message": "Cannot find name 'QueryMetadata'.", "startLineNumber": 12, "relatedInformation": [{"startLineNumber": 3, "message": "declared here"}]}, {"resource": "/app/lib/llm.ts", "message": "no code"}]
+
+{"resource": "/app/app/api/chat/route.ts", "code": "2307", "message": "Cannot find module '../../utils/cache' or its corresponding type declarations.", "startLineNumber": 4}
+
+{"resource": "/app/lib/redis.ts", "code": "1308", "message": "'await' expressions are only allowed within async functions and at the top levels of modules.", "startLineNumber": 40}
+
+Traceback (most recent call last):
+  File "/home/dev/tools/AI_debugger.py", line 217, in <module>
+    result = call_gemini(model, prompt)
+KeyError: 'text'
+
+just some text without errors"""
+
+PARSED_LOGS = [
+    {
+        "resource": "/app/lib/llm.ts", "code": "2304", "message": "Cannot find name 'QueryMetadata'.",
+        "startLineNumber": 12, "relatedInformation": [{"startLineNumber": 3, "message": "declared here"}],
+    },
+    {
+        "resource": "/app/app/api/chat/route.ts", "code": "2307",
+        "message": "Cannot find module '../../utils/cache' or its corresponding type declarations.", "startLineNumber": 4,
+    },
+    {
+        "resource": "/app/lib/redis.ts", "code": "1308",
+        "message": "'await' expressions are only allowed within async functions and at the top levels of modules.",
+        "startLineNumber": 40,
+    },
+    {"file": "AI_debugger.py", "line": "217", "code": "KeyError", "message": "'text'", "snippet": "KeyError: 'text'"},
+]
+
+
+def test_format_logs():
+    formatted_logs_md, logs = format_logs(RAW_LOGS)
+    assert logs == PARSED_LOGS
+    assert formatted_logs_md == f"```json\n{json.dumps(PARSED_LOGS, indent=2)}\n```"
+
+
+@pytest.mark.parametrize("raw_input", ["", "   ", "nothing to see here"])
+def test_format_logs_without_errors(raw_input):
+    assert format_logs(raw_input) == ("", [])
+
+
+@pytest.mark.parametrize("raw_input", [
+    "x" * 200000,
+    "KeyError: x\n" + "".join(f"line {i}\n" for i in range(50000)),
+])
+def test_format_logs_long_input_is_fast(raw_input):
+    start = time.perf_counter()
+    format_logs(raw_input)
+    assert time.perf_counter() - start < 1
+
+
+def test_format_logs_indented_code_line():
+    # Used to raise ValueError looking up the stripped line in the unstripped ones
+    _, logs = format_logs('File "/app/a.py", line 3\nKeyError: x\n    return y\n')
+    assert logs == [{"file": "a.py", "line": "3", "code": "KeyError", "message": "x", "snippet": "KeyError: x"}]
+
+
+def test_extract_info_from_logs():
+    files, errors = extract_info_from_logs(PARSED_LOGS)
+    assert files == ["AI_debugger.py", "llm.ts", "redis.ts", "route.ts"]
+    assert errors == [
+        {
+            "file": "llm.ts", "code": "2304", "message": "Cannot find name 'QueryMetadata'.", "line": 12,
+            "snippet": "", "related": [{"startLineNumber": 3, "message": "declared here"}],
+            "module_path": None, "identifier": "QueryMetadata", "async_issue": False,
+        },
+        {
+            "file": "route.ts", "code": "2307",
+            "message": "Cannot find module '../../utils/cache' or its corresponding type declarations.", "line": 4,
+            "snippet": "", "related": [], "module_path": "../../utils/cache", "identifier": None, "async_issue": False,
+        },
+        {
+            "file": "redis.ts", "code": "1308",
+            "message": "'await' expressions are only allowed within async functions and at the top levels of modules.",
+            "line": 40, "snippet": "", "related": [], "module_path": None, "identifier": None, "async_issue": True,
+        },
+        {
+            "file": "AI_debugger.py", "code": "KeyError", "message": "'text'", "line": "217",
+            "snippet": "KeyError: 'text'", "related": [], "module_path": None, "identifier": None, "async_issue": False,
+        },
+    ]
+
+
+def test_generate_prompt_includes_logs_and_instructions():
+    formatted_logs_md, logs = format_logs(RAW_LOGS)
+    files, errors = extract_info_from_logs(logs)
+    prompt = generate_prompt(formatted_logs_md, files, errors, "Use Upstash Redis. ")
+    assert "issues in AI_debugger.py, llm.ts, redis.ts, route.ts" in prompt
+    assert prompt.endswith(f"\n### Error Logs\n{formatted_logs_md}\n### Instructions\n```\nUse Upstash Redis.\n```\n")
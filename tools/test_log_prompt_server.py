@@ -0,0 +1,316 @@
+import http.client
+import json
+import socket
+import threading
+import time
+
+import pytest
+
+import log_prompt_server
+from log_prompt_server import LogPromptServer
+
+DIAGNOSTICS = json.dumps([
+    {"resource": "/app/lib/llm.ts", "code": "2304", "message": "Cannot find name 'Foo'.", "startLineNumber": 3},
+    {"resource": "/app/lib/redis.ts", "code": "2307", "message": "Cannot find module './cache'.", "startLineNumber": 1},
+]).encode()
+
+
+@pytest.fixture
+def make_server():
+    servers = []
+
+    def start(**kwargs):
+        server = LogPromptServer(("127.0.0.1", 0), **kwargs)
+        thread = threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+        thread.start()
+        servers.append((server, thread))
+        return server.server_address[1]
+
+    yield start
+    for server, thread in servers:
+        server.shutdown()
+        server.server_close()
+        thread.join()
+
+
+@pytest.fixture
+def port(make_server):
+    return make_server(max_body=4096)
+
+
+def chunked(body, size=7):
+    parts = [b"%x\r\n%s\r\n" % (len(body[i:i + size]), body[i:i + size]) for i in range(0, len(body), size)]
+    return b"".join(parts) + b"0\r\n\r\n"
+
+
+def raw_request(sock, path, body=b"", headers=(), use_chunked=False):
+    lines = [f"POST {path} HTTP/1.1", "Host: test", *headers]
+    if use_chunked:
+        lines.append("Transfer-Encoding: chunked")
+        body = chunked(body)
+    else:
+        lines.append(f"Content-Length: {len(body)}")
+    sock.sendall("\r\n".join(lines).encode() + b"\r\n\r\n" + body)
+    return read_response(sock)
+
+
+def read_response(sock):
+    response = http.client.HTTPResponse(sock)
+    response.begin()
+    return response, json.loads(response.read())
+
+
+def post(port, path, body=b"", headers=(), use_chunked=False):
+    with socket.create_connection(("127.0.0.1", port), timeout=5) as sock:
+        return raw_request(sock, path, body, headers, use_chunked)
+
+
+def test_health(port):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+    conn.request("GET", "/health")
+    response = conn.getresponse()
+    payload = json.loads(response.read())
+    assert response.status == 200
+    assert payload["status"] == "ok"
+    assert response.getheader("X-Queue-Wait-Ms") is not None
+
+
+@pytest.mark.parametrize("use_chunked", [False, True])
+def test_logs(port, use_chunked):
+    response, payload = post(port, "/logs", DIAGNOSTICS, use_chunked=use_chunked)
+    assert response.status == 200
+    assert payload["count"] == 2
+    assert payload["logs"] == json.loads(DIAGNOSTICS)
+
+
+@pytest.mark.parametrize("use_chunked", [False, True])
+def test_errors(port, use_chunked):
+    response, payload = post(port, "/errors", DIAGNOSTICS, use_chunked=use_chunked)
+    assert response.status == 200
+    assert payload["files"] == ["llm.ts", "redis.ts"]
+    assert [e["identifier"] for e in payload["errors"]] == ["Foo", None]
+    assert payload["errors"][1]["module_path"] == "./cache"
+
+
+@pytest.mark.parametrize("use_chunked", [False, True])
+def test_debug_prompt_raw_logs(port, use_chunked):
+    response, payload = post(port, "/debug-prompt", DIAGNOSTICS, use_chunked=use_chunked)
+    assert response.status == 200
+    assert payload["files"] == ["llm.ts", "redis.ts"]
+    assert "Cannot find name 'Foo'." in payload["prompt"]
+    assert "### Instructions" not in payload["prompt"]
+
+
+def test_debug_prompt_json_body(port):
+    body = json.dumps({"logs": DIAGNOSTICS.decode(), "instructions": "Project uses Upstash Redis."}).encode()
+    response, payload = post(port, "/debug-prompt", body, headers=["Content-Type: application/json"])
+    assert response.status == 200
+    assert payload["count"] == 2
+    assert payload["prompt"].endswith("### Instructions\n```\nProject uses Upstash Redis.\n```\n")
+
+
+@pytest.mark.parametrize("body", [b"[1]", b'{"logs": 3}', b"{"])
+def test_debug_prompt_bad_json_body(port, body):
+    response, payload = post(port, "/debug-prompt", body, headers=["Content-Type: application/json"])
+    assert response.status == 400
+
+
+def test_debug_prompt_empty(port):
+    response, _ = post(port, "/debug-prompt", b"  ")
+    assert response.status == 400
+
+
+@pytest.mark.parametrize("use_chunked", [False, True])
+def test_prompts(port, use_chunked):
+    response, payload = post(port, "/prompts", DIAGNOSTICS, use_chunked=use_chunked)
+    assert response.status == 200
+    assert payload["count"] == 2
+    assert payload["truncated"] == 0
+    [prompt] = payload["prompts"]
+    assert prompt["files"] == ["/app/lib/llm.ts", "/app/lib/redis.ts"]
+
+
+@pytest.mark.parametrize("use_chunked", [False, True])
+def test_prompts_invalid_json(port, use_chunked):
+    response, payload = post(port, "/prompts", b"[1,", use_chunked=use_chunked)
+    assert response.status == 400
+    assert payload["error"].startswith("Invalid JSON")
+
+
+def test_unknown_endpoint(port):
+    response, _ = post(port, "/nope", b"x")
+    assert response.status == 404
+
+
+def test_keep_alive_reuses_connection(port):
+    with socket.create_connection(("127.0.0.1", port), timeout=5) as sock:
+        for use_chunked in (False, True, False):
+            response, payload = raw_request(sock, "/errors", DIAGNOSTICS, use_chunked=use_chunked)
+            assert response.status == 200
+            assert not response.will_close
+
+
+def test_pipelined_requests(port):
+    request = b"GET /health HTTP/1.1\r\nHost: test\r\n\r\n"
+    with socket.create_connection(("127.0.0.1", port), timeout=5) as sock:
+        sock.sendall(request * 3)
+        # Read all three through one buffer; an HTTPResponse per response would each read ahead
+        rfile = sock.makefile("rb")
+        for _ in range(3):
+            assert rfile.readline().startswith(b"HTTP/1.1 200")
+            headers = http.client.parse_headers(rfile)
+            assert json.loads(rfile.read(int(headers["Content-Length"])))["status"] == "ok"
+
+
+def test_malformed_chunk_size(port):
+    with socket.create_connection(("127.0.0.1", port), timeout=5) as sock:
+        sock.sendall(b"POST /logs HTTP/1.1\r\nHost: test\r\nTransfer-Encoding: chunked\r\n\r\nzz\r\nabc\r\n0\r\n\r\n")
+        response, payload = read_response(sock)
+        assert response.status == 400
+        assert payload["error"] == "Malformed chunk size."
+        assert response.will_close
+
+
+@pytest.mark.parametrize("body", [b"3\r\nabcXYZ\r\n0\r\n\r\n", b"3\r\nabc\n0\r\n\r\n"])
+def test_chunk_longer_than_its_size(port, body):
+    with socket.create_connection(("127.0.0.1", port), timeout=5) as sock:
+        sock.sendall(b"POST /logs HTTP/1.1\r\nHost: test\r\nTransfer-Encoding: chunked\r\n\r\n" + body)
+        response, payload = read_response(sock)
+        assert response.status == 400
+        assert payload["error"] == "Malformed chunked body."
+        assert response.will_close
+
+
+@pytest.mark.parametrize("use_chunked", [False, True])
+def test_body_too_large(port, use_chunked):
+    response, payload = post(port, "/logs", b"x" * 5000, use_chunked=use_chunked)
+    assert response.status == 413
+    assert response.will_close
+
+
+@pytest.mark.parametrize("use_chunked", [False, True])
+def test_text_body_limit(make_server, use_chunked):
+    port = make_server(max_body=4096, max_text_body=1024)
+    for path in ("/logs", "/errors", "/debug-prompt"):
+        response, payload = post(port, path, b" " * 2000, use_chunked=use_chunked)
+        assert response.status == 413
+        assert payload["error"] == "Request body larger than 1024 bytes."
+    # /prompts streams its body and keeps the larger limit
+    response, _ = post(port, "/prompts", DIAGNOSTICS + b" " * 2000, use_chunked=use_chunked)
+    assert response.status == 200
+
+
+@pytest.mark.parametrize("length", ["-1", "abc"])
+def test_invalid_content_length(port, length):
+    with socket.create_connection(("127.0.0.1", port), timeout=5) as sock:
+        sock.sendall(f"POST /logs HTTP/1.1\r\nHost: test\r\nContent-Length: {length}\r\n\r\n".encode() + b"x" * 5000)
+        response, payload = read_response(sock)
+        assert response.status == 400
+        assert payload["error"] == "Invalid Content-Length."
+        assert response.will_close
+
+
+def trickle(sock, data, interval=0.05, limit=5):
+    """Send `data` a byte at a time; return the seconds until the server answered or hung up."""
+    sock.settimeout(interval)
+    start = time.monotonic()
+    for byte in data:
+        if time.monotonic() - start > limit:
+            break
+        try:
+            sock.sendall(bytes([byte]))
+            # Returns once the server has answered or closed the connection
+            sock.recv(1, socket.MSG_PEEK)
+            break
+        except socket.timeout:
+            continue
+        except OSError:
+            break
+    return time.monotonic() - start
+
+
+def test_slow_headers_hit_deadline(port, monkeypatch):
+    monkeypatch.setattr(log_prompt_server, "HEADER_TIMEOUT", 0.5)
+    with socket.create_connection(("127.0.0.1", port), timeout=5) as sock:
+        elapsed = trickle(sock, b"GET /health HTTP/1.1\r\nX-Padding: " + b"x" * 200 + b"\r\n\r\n")
+        assert 0.4 < elapsed < 1.5
+
+
+def test_slow_body_hits_deadline(port, monkeypatch):
+    monkeypatch.setattr(log_prompt_server, "BODY_TIMEOUT", 0.5)
+    with socket.create_connection(("127.0.0.1", port), timeout=5) as sock:
+        sock.sendall(b"POST /logs HTTP/1.1\r\nHost: test\r\nContent-Length: 200\r\n\r\n")
+        elapsed = trickle(sock, b"x" * 200)
+        assert 0.4 < elapsed < 1.5
+        sock.settimeout(5)
+        response, payload = read_response(sock)
+        assert response.status == 408
+        assert response.will_close
+
+
+def test_partly_read_body_closes_connection(port):
+    with socket.create_connection(("127.0.0.1", port), timeout=5) as sock:
+        # max_chars is rejected before the body is read
+        response, payload = raw_request(sock, "/prompts?max_chars=abc", DIAGNOSTICS)
+        assert response.status == 400
+        assert response.will_close
+        assert sock.recv(1) == b""
+
+
+def test_fully_read_body_keeps_connection(port):
+    with socket.create_connection(("127.0.0.1", port), timeout=5) as sock:
+        response, _ = raw_request(sock, "/prompts", b"[1,")
+        assert response.status == 400
+        assert not response.will_close
+        response, _ = raw_request(sock, "/prompts", DIAGNOSTICS)
+        assert response.status == 200
+
+
+def test_busy_server_returns_503(make_server):
+    port = make_server(workers=1, queue=0)
+    with socket.create_connection(("127.0.0.1", port), timeout=5) as busy:
+        # Hold the only worker with a streamed body that hasn't finished
+        busy.sendall(b"POST /logs HTTP/1.1\r\nHost: test\r\nTransfer-Encoding: chunked\r\n\r\n3\r\nabc\r\n")
+        time.sleep(0.2)
+        response, payload = post(port, "/logs", b"x")
+        assert response.status == 503
+        assert response.getheader("Retry-After") == "1"
+
+        busy.sendall(b"0\r\n\r\n")
+        response, _ = read_response(busy)
+        assert response.status == 200
+
+
+def test_reject_does_not_block():
+    server = LogPromptServer(("127.0.0.1", 0))
+    sock, peer = socket.socketpair()
+    try:
+        # A client that never reads: its receive buffer is already full
+        sock.setblocking(False)
+        with pytest.raises(BlockingIOError):
+            while True:
+                sock.send(b"x" * 65536)
+        start = time.monotonic()
+        server.reject(sock)
+        assert time.monotonic() - start < 0.5
+    finally:
+        sock.close()
+        peer.close()
+        server.server_close()
+
+
+def test_idle_connections_do_not_hold_workers(make_server):
+    port = make_server(workers=1, queue=0)
+    idle = [socket.create_connection(("127.0.0.1", port), timeout=5) for _ in range(3)]
+    try:
+        with socket.create_connection(("127.0.0.1", port), timeout=5) as sock:
+            # A finished keep-alive request also gives its worker back
+            response, _ = raw_request(sock, "/logs", b"x")
+            assert response.status == 200
+            start = time.monotonic()
+            response, _ = post(port, "/logs", b"x")
+            assert response.status == 200
+            assert time.monotonic() - start < 1
+    finally:
+        for sock in idle:
+            sock.close()